@@ -0,0 +1,25 @@
+# Chess engine: board representation, move rules, evaluation and search,
+# with no dependency on pygame. The batch evaluator needs NumPy and is only
+# imported when one of its functions is first looked up.
+
+from .constants import PIECE_VALUES
+from .position import (CHECKMATE, STALEMATE, NO_MOVE, Position, encode_move,
+                       move_to_tuple, generate_moves, generate_legal_moves,
+                       game_result, is_in_check)
+from .rules import (rules, find_king_position, find_checkers,
+                    is_king_in_check, is_checkmate, is_stalemate)
+from .evaluation import evaluate_position, pawn_hash_table
+from .search import (AI_TIME_LIMIT, MAX_SEARCH_DEPTH, MATE_SCORE,
+                     SEARCH_WORKERS, SearchContext, SearchTimeout,
+                     TranspositionTable, get_transposition_table,
+                     minimax_alpha_beta, iterative_deepening,
+                     get_search_pool, close_search_pool)
+
+_BATCH_NAMES = ('evaluate_batch', 'positions_to_array')
+
+
+def __getattr__(name):
+    if name in _BATCH_NAMES:
+        from . import batch
+        return getattr(batch, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,91 @@
+# Vectorised evaluation of many positions at once. Kept apart from the rest
+# of the engine so only callers that want it pay for importing NumPy.
+
+import numpy as np
+
+from .constants import MAX_PHASE
+from .position import (EMPTY, ENDGAME_PST, MIDDLEGAME_PST, PAWN,
+                       PIECE_INDEX_VALUES, PIECE_PHASE_WEIGHTS)
+
+
+# Batch Evaluation
+# Scores many positions at once with vectorised NumPy, for offline analysis
+# and tuning. Positions come as an (N, 64) array of piece indices (EMPTY for
+# empty squares, square numbering as on Position) or as (N, 12, 8, 8) piece
+# planes, and the result matches evaluate_static_terms for each of them.
+# Per-piece tables with a leading row of zeros for empty squares, indexed by
+# piece + 1 and, for the piece-square tables, signed for White's view
+BATCH_PIECE_VALUES = np.array([0] + [value if piece < 6 else -value
+                                     for piece, value in enumerate(PIECE_INDEX_VALUES)],
+                              dtype=np.float64)
+BATCH_PHASE_WEIGHTS = np.array([0] + PIECE_PHASE_WEIGHTS, dtype=np.int64)
+BATCH_MIDDLEGAME_PST = np.array([[0] * 64] + [row if piece < 6 else [-v for v in row]
+                                              for piece, row in enumerate(MIDDLEGAME_PST)],
+                                dtype=np.float64)
+BATCH_ENDGAME_PST = np.array([[0] * 64] + [row if piece < 6 else [-v for v in row]
+                                           for piece, row in enumerate(ENDGAME_PST)],
+                             dtype=np.float64)
+BATCH_SQUARES = np.arange(64)
+
+
+def positions_to_array(positions):
+    return np.array([pos.squares for pos in positions], dtype=np.int8).reshape(-1, 64)
+
+
+def _batch_pawn_structure(own, enemy, white):
+    counts = own.sum(axis=1, dtype=np.int32)  # (N, 8) pawns per file
+    present = counts > 0
+    padded = np.pad(present, ((0, 0), (1, 1)))
+    left, right = padded[:, :-2], padded[:, 2:]
+
+    doubled = np.maximum(counts - 1, 0).sum(axis=1)
+    # Islands are counted over the sorted list of pawn files, where a doubled
+    # pawn also starts a new island
+    islands = (present & ~left).sum(axis=1) + doubled
+    isolated = (counts * (~left & ~right)).sum(axis=1)
+
+    # Walk the rows from the far end towards the pawns' own side, keeping
+    # track of which files already have a pawn in front
+    own_ahead = np.zeros_like(present)
+    enemy_ahead = np.zeros_like(present)
+    backward = np.zeros_like(counts)
+    passed = np.zeros_like(counts)
+    for row in (range(8) if white else range(7, -1, -1)):
+        pawns = own[:, row]
+        backward += pawns & ~own_ahead & enemy_ahead
+        enemy_span = enemy_ahead.copy()
+        enemy_span[:, 1:] |= enemy_ahead[:, :-1]
+        enemy_span[:, :-1] |= enemy_ahead[:, 1:]
+        passed += pawns & ~enemy_span
+        own_ahead |= pawns
+        enemy_ahead |= enemy[:, row]
+
+    return (-10 * islands - 20 * doubled - 30 * isolated
+            - 40 * backward.sum(axis=1) + 50 * passed.sum(axis=1))
+
+
+def evaluate_batch(positions, color='w'):
+    positions = np.asarray(positions)
+    if positions.ndim == 4:
+        planes = positions.reshape(len(positions), 12, 64).astype(bool)
+        pieces = np.where(planes.any(axis=1), planes.argmax(axis=1), EMPTY)
+    else:
+        pieces = positions.reshape(-1, 64)
+    index = pieces.astype(np.intp) + 1  # Row 0 of every lookup table is "empty"
+
+    material = BATCH_PIECE_VALUES[index].sum(axis=1)
+    activity = material / 10
+    phase = np.minimum(BATCH_PHASE_WEIGHTS[index].sum(axis=1), MAX_PHASE)
+
+    white_pawns = (pieces == PAWN).reshape(-1, 8, 8)
+    black_pawns = (pieces == 6 + PAWN).reshape(-1, 8, 8)
+    pawn_structure = (_batch_pawn_structure(white_pawns, black_pawns, True)
+                      - _batch_pawn_structure(black_pawns, white_pawns, False))
+
+    score = (material + pawn_structure + activity) * (0.8 + 0.4 * phase / MAX_PHASE)
+
+    middlegame = BATCH_MIDDLEGAME_PST[index, BATCH_SQUARES].sum(axis=1)
+    endgame = BATCH_ENDGAME_PST[index, BATCH_SQUARES].sum(axis=1)
+    score += (middlegame * phase + endgame * (MAX_PHASE - phase)) / MAX_PHASE
+
+    return score if color == 'w' else -score
@@ -0,0 +1,313 @@
+# Static evaluation of a Position
+
+from array import array
+
+from .constants import CENTER_SQUARES, MAX_PHASE
+from .position import (BISHOP, BISHOP_DIRECTIONS, BLACK_SIDE, FULL_BOARD,
+                       KING_ATTACKS, KNIGHT, KNIGHT_ATTACKS, LAST_ROWS, PAWN,
+                       PAWN_ATTACKS, QUEEN, ROOK, ROOK_DIRECTIONS, ROW_MASKS,
+                       WHITE_SIDE, iter_bits, popcount, side_index,
+                       sliding_attacks, square_index, square_row_col)
+
+
+# Center squares indexed for the bitboard Position
+CENTER_SQUARE_INDICES = [square_index(row, col) for row, col in CENTER_SQUARES]
+
+
+# Attack Map
+# Built once per evaluated node and shared by every evaluation term. For each
+# side it holds the attacked-squares mask, the number of attackers on every
+# square and the number of pseudo-legal moves.
+class AttackMap:
+    __slots__ = ('attacked', 'counts', 'mobility')
+
+    def __init__(self, pos):
+        self.attacked = [0, 0]
+        self.counts = [[0] * 64, [0] * 64]
+        self.mobility = [0, 0]
+        occupied = pos.occupied
+        empty = ~occupied & FULL_BOARD
+        for side in (WHITE_SIDE, BLACK_SIDE):
+            base = side * 6
+            not_own = ~pos.occupancy[side] & FULL_BOARD
+            enemy = pos.occupancy[side ^ 1]
+            counts = self.counts[side]
+            attacked = 0
+            mobility = 0
+
+            # Pawn pushes, with each promotion counting once per piece choice
+            pawns = pos.bitboards[base + PAWN]
+            if side == WHITE_SIDE:
+                single = (pawns >> 8) & empty
+                double = ((single & ROW_MASKS[5]) >> 8) & empty
+            else:
+                single = (pawns << 8) & empty
+                double = ((single & ROW_MASKS[2]) << 8) & empty
+            mobility += popcount(single) + 3 * popcount(single & LAST_ROWS) + popcount(double)
+
+            for piece_type in range(6):
+                pieces = pos.bitboards[base + piece_type]
+                while pieces:
+                    low = pieces & -pieces
+                    sq = low.bit_length() - 1
+                    pieces ^= low
+                    if piece_type == PAWN:
+                        targets = PAWN_ATTACKS[side][sq]
+                        captures = targets & enemy
+                        mobility += popcount(captures) + 3 * popcount(captures & LAST_ROWS)
+                    else:
+                        if piece_type == KNIGHT:
+                            targets = KNIGHT_ATTACKS[sq]
+                        elif piece_type == BISHOP:
+                            targets = sliding_attacks(sq, occupied, BISHOP_DIRECTIONS)
+                        elif piece_type == ROOK:
+                            targets = sliding_attacks(sq, occupied, ROOK_DIRECTIONS)
+                        elif piece_type == QUEEN:
+                            targets = sliding_attacks(sq, occupied, range(8))
+                        else:
+                            targets = KING_ATTACKS[sq]
+                        mobility += popcount(targets & not_own)
+                    attacked |= targets
+                    while targets:
+                        target_low = targets & -targets
+                        target = target_low.bit_length() - 1
+                        counts[target] += 1
+                        targets ^= target_low
+            self.attacked[side] = attacked
+            self.mobility[side] = mobility
+
+
+# Game phase from MAX_PHASE (all pieces on the board) down to 0 (kings and
+# pawns only); promotions can push the raw count past MAX_PHASE
+def determine_game_phase(pos):
+    return min(pos.phase, MAX_PHASE)
+    
+def evaluate_king_safety(pos, color, attacks=None):
+    if attacks is None:
+        attacks = AttackMap(pos)
+    side = side_index(color)
+    opponent = side ^ 1
+    king_sq = pos.king_square(side)
+    if king_sq is None:
+        return 0  # King not found, should not happen in a valid board state
+
+    # Each attacker of the king subtracts 10 points
+    safety_score = -10 * attacks.counts[opponent][king_sq]
+
+    # Squares around the king: each one under attack subtracts 5 points, each
+    # one covered by a piece other than the king itself adds 5 points
+    around_king = KING_ATTACKS[king_sq]
+    safety_score -= 5 * popcount(around_king & attacks.attacked[opponent])
+    own_counts = attacks.counts[side]
+    for sq in iter_bits(around_king):
+        if own_counts[sq] > 1:
+            safety_score += 5
+
+    return safety_score
+
+def evaluate_center_control(pos, color, attacks=None):
+    if attacks is None:
+        attacks = AttackMap(pos)
+    score = 0
+    side = side_index(color)
+    own = pos.occupancy[side]
+    enemy = pos.occupancy[side ^ 1]
+
+    # Pieces are counted rather than weighed by value, so a queen eyeing d4
+    # does not outweigh the pawn exchanges that decide who holds it
+    for sq in CENTER_SQUARE_INDICES:
+        # Each piece standing on a center square adds 20 points
+        score += 20 * ((own >> sq & 1) - (enemy >> sq & 1))
+
+        # Each attacker of a center square adds 10 points
+        score += 10 * (attacks.counts[side][sq] - attacks.counts[side ^ 1][sq])
+
+    return score
+
+def calculate_mobility(pos, color, attacks=None):
+    if attacks is None:
+        attacks = AttackMap(pos)
+    return attacks.mobility[side_index(color)]
+
+def evaluate_piece_activity(pos, color):
+    return pos.material[side_index(color)] / 10  # Adjusted activity score
+
+def get_pawns(pos, color):
+    return [square_row_col(sq) for sq in iter_bits(pos.pieces(color, PAWN))]
+
+def evaluate_pawn_structure(pos, color):
+    pawns = get_pawns(pos, color)
+    if not pawns:
+        return 0
+    
+    files = sorted([pawn[1] for pawn in pawns])
+    islands = 1
+    for i in range(1, len(files)):
+        if files[i] != files[i-1] + 1:
+            islands += 1
+    
+    file_counts = {}
+    for pawn in pawns:
+        col = pawn[1]
+        file_counts[col] = file_counts.get(col, 0) + 1
+    
+    doubled = sum(count - 1 for count in file_counts.values() if count > 1)
+    
+    files_set = set(files)
+    isolated = 0
+    for pawn in pawns:
+        col = pawn[1]
+        adjacent = set()
+        if col > 0:
+            adjacent.add(col - 1)
+        if col < 7:
+            adjacent.add(col + 1)
+        if not adjacent & files_set:
+            isolated += 1
+    
+    own_pawns = pos.pieces(color, PAWN)
+    enemy_pawns = pos.pieces('b' if color == 'w' else 'w', PAWN)
+    backward = 0
+    for pawn in pawns:
+        row, col = pawn
+        support_rows = range(row - 1, -1, -1) if color == 'w' else range(row + 1, 8)
+        supported = any(own_pawns >> square_index(r, col) & 1 for r in support_rows)
+        if not supported:
+            enemy_rows = range(row - 1, -1, -1) if color == 'w' else range(row + 1, 8)
+            if any(enemy_pawns >> square_index(r, col) & 1 for r in enemy_rows):
+                backward += 1
+    
+    passed = 0
+    for pawn in pawns:
+        row, col = pawn
+        is_passed = True
+        step = -1 if color == 'w' else 1
+        end = -1 if color == 'w' else 8
+        for r in range(row + step, end, step):
+            if enemy_pawns >> square_index(r, col) & 1:
+                is_passed = False
+                break
+            if col > 0 and enemy_pawns >> square_index(r, col - 1) & 1:
+                is_passed = False
+                break
+            if col < 7 and enemy_pawns >> square_index(r, col + 1) & 1:
+                is_passed = False
+                break
+        if is_passed:
+            passed += 1
+    
+    score = (
+        -10 * islands
+        - 20 * doubled
+        - 30 * isolated
+        - 40 * backward
+        + 50 * passed
+    )
+    return score
+
+# Pawn Hash Table
+# Pawn structure changes far less often than the rest of the position, so
+# both colours' evaluate_pawn_structure scores are cached by pawn key. The
+# table is direct-mapped with a fixed number of entries: a new structure
+# always replaces whatever shared its slot. An unused slot (key 0, scores 0)
+# is also the correct entry for a board without pawns.
+PAWN_HASH_ENTRIES = 1 << 14
+
+
+class PawnHashTable:
+    def __init__(self, entries=PAWN_HASH_ENTRIES):
+        self.entries = entries
+        self.keys = array('Q', bytes(8 * entries))
+        self.white_scores = array('i', bytes(4 * entries))
+        self.black_scores = array('i', bytes(4 * entries))
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.__init__(self.entries)
+
+    # (White, Black) pawn structure scores for the position
+    def probe(self, pos):
+        key = pos.pawn_key
+        index = key % self.entries
+        if self.keys[index] == key:
+            self.hits += 1
+            return self.white_scores[index], self.black_scores[index]
+        self.misses += 1
+        white = evaluate_pawn_structure(pos, 'w')
+        black = evaluate_pawn_structure(pos, 'b')
+        self.keys[index] = key
+        self.white_scores[index] = white
+        self.black_scores[index] = black
+        return white, black
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+
+pawn_hash_table = PawnHashTable()
+
+
+# Game Phase: the material and positional terms weigh 1.2x with every piece
+# on the board, sliding smoothly down to 0.8x once only kings and pawns remain
+def phase_scale(phase):
+    return 0.8 + 0.4 * phase / MAX_PHASE
+
+
+# Terms that depend only on where the pieces stand (material, pawn structure,
+# piece activity and piece-square tables); evaluate_batch computes the same
+# thing for many positions at once
+def evaluate_static_terms(pos, color):
+    side = side_index(color)
+    opponent = 'b' if color == 'w' else 'w'
+
+    # Material Evaluation (kept up to date by make/unmake)
+    score = pos.material[side] - pos.material[side ^ 1]
+
+    # Pawn Structure
+    white_pawns, black_pawns = pawn_hash_table.probe(pos)
+    score += white_pawns - black_pawns if side == WHITE_SIDE else black_pawns - white_pawns
+
+    # Piece Activity
+    score += evaluate_piece_activity(pos, color) - evaluate_piece_activity(pos, opponent)
+
+    phase = determine_game_phase(pos)
+    score *= phase_scale(phase)
+
+    # Piece Square Tables (kept up to date by make/unmake), blended between
+    # the middlegame and endgame tables by phase
+    middlegame = pos.mg_pst[side] - pos.mg_pst[side ^ 1]
+    endgame = pos.eg_pst[side] - pos.eg_pst[side ^ 1]
+    score += (middlegame * phase + endgame * (MAX_PHASE - phase)) / MAX_PHASE
+    return score
+
+
+def evaluate_position(pos, color):
+    score = 0
+
+    # One attack map feeds center control, king safety and mobility
+    attacks = AttackMap(pos)
+
+    # Center Control
+    score += evaluate_center_control(pos, color, attacks)
+
+    # The search scores every node for the side to move, so one-sided terms
+    # are counted for both sides to keep the score symmetric
+    opponent = 'b' if color == 'w' else 'w'
+
+    # King Safety
+    score += (evaluate_king_safety(pos, color, attacks)
+              - evaluate_king_safety(pos, opponent, attacks))
+
+    score *= phase_scale(determine_game_phase(pos))
+
+    # Material, Pawn Structure, Piece Activity and Piece Square Tables
+    score += evaluate_static_terms(pos, color)
+
+    # Mobility
+    my_mobility = calculate_mobility(pos, color, attacks)
+    opp_mobility = calculate_mobility(pos, opponent, attacks)
+    score += my_mobility - opp_mobility  # Adjust the weight as needed
+    
+    return score
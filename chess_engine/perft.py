@@ -0,0 +1,136 @@
+# Perft: counts the leaf nodes of the legal move tree to a fixed depth. The
+# counts for the standard positions below are published, so any change to
+# move generation can be checked against them, and the time taken gives the
+# generator's speed.
+#
+#     python -m chess_engine.perft                     run the suite
+#     python -m chess_engine.perft -d 4 --divide       count per root move
+#     python -m chess_engine.perft --fen "<fen>" -d 3
+
+import argparse
+import sys
+import time
+
+from .position import START_FEN, Position, generate_legal_moves, move_to_uci
+
+# (name, FEN, leaf counts for depth 1, 2, ...), between them covering
+# castling, en passant, promotions, pins and checks
+PERFT_SUITE = [
+    ('startpos', START_FEN,
+     [20, 400, 8902, 197281, 4865609, 119060324]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     [48, 2039, 97862, 4085603, 193690690]),
+    ('position3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     [14, 191, 2812, 43238, 674624, 11030083]),
+    ('position4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     [6, 264, 9467, 422333, 15833292]),
+    ('position5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     [44, 1486, 62379, 2103487, 89941194]),
+    ('position6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     [46, 2079, 89890, 3894594, 164075551]),
+]
+SUITE_MAX_NODES = 1000000  # Deepest count the suite runs by default, per position
+
+
+# Leaf nodes `depth` plies below pos. The last ply is counted from the
+# length of the move list rather than played out.
+def perft(pos, depth):
+    if depth == 0:
+        return 1
+    moves = generate_legal_moves(pos)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        pos.make_move(move)
+        nodes += perft(pos, depth - 1)
+        pos.unmake_move()
+    return nodes
+
+
+# perft split by root move: a list of (move, leaf nodes), for finding which
+# move a wrong count comes from
+def divide(pos, depth):
+    counts = []
+    for move in generate_legal_moves(pos):
+        pos.make_move(move)
+        counts.append((move, perft(pos, depth - 1)))
+        pos.unmake_move()
+    return counts
+
+
+def format_rate(nodes, seconds):
+    return f"{nodes / seconds:,.0f} nps" if seconds > 0 else "- nps"
+
+
+# Check every suite position at each depth whose count is at most max_nodes
+# (or exactly at `depth`); True when every count matched and there was at
+# least one to check
+def run_suite(max_nodes=SUITE_MAX_NODES, depth=None, output=sys.stdout):
+    passed = True
+    checked = 0
+    total_nodes = total_time = 0
+    for name, fen, counts in PERFT_SUITE:
+        pos = Position.from_fen(fen)
+        for level, expected in enumerate(counts, 1):
+            if depth is not None and level != depth:
+                continue
+            if depth is None and expected > max_nodes:
+                break
+            start = time.perf_counter()
+            nodes = perft(pos, level)
+            elapsed = time.perf_counter() - start
+            checked += 1
+            total_nodes += nodes
+            total_time += elapsed
+            status = 'ok' if nodes == expected else f'FAILED, expected {expected}'
+            passed &= nodes == expected
+            print(f"{name:<10} depth {level}  {nodes:>10}  {elapsed:7.2f}s  "
+                  f"{format_rate(nodes, elapsed):>14}  {status}", file=output)
+    print(f"{'total':<10} {total_nodes:>18}  {total_time:7.2f}s  "
+          f"{format_rate(total_nodes, total_time):>14}", file=output)
+    if not checked:
+        print("No suite count to check at this depth or node limit", file=output)
+    return passed and checked > 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m chess_engine.perft',
+                                     description="Count legal move tree leaves.")
+    parser.add_argument('--fen', help="position to count from (default: run the suite)")
+    parser.add_argument('-d', '--depth', type=int,
+                        help="depth to count to (default for the suite: every depth "
+                             "up to --max-nodes)")
+    parser.add_argument('--divide', action='store_true', help="show the count of each root move")
+    parser.add_argument('--max-nodes', type=int, default=SUITE_MAX_NODES,
+                        help="largest suite count to run when no depth is given")
+    args = parser.parse_args(argv)
+    if args.depth is not None and args.depth < 0:
+        parser.error("the depth cannot be negative")
+    if args.divide and args.depth == 0:
+        parser.error("--divide needs a depth of at least 1")
+
+    if args.fen is None and not args.divide:
+        return 0 if run_suite(args.max_nodes, args.depth) else 1
+
+    try:
+        pos = Position.from_fen(args.fen or START_FEN)
+    except ValueError as error:
+        parser.error(str(error))
+    depth = 1 if args.depth is None else args.depth
+    start = time.perf_counter()
+    if args.divide:
+        nodes = 0
+        for move, count in sorted(divide(pos, depth), key=lambda item: move_to_uci(item[0])):
+            print(f"{move_to_uci(move)}: {count}")
+            nodes += count
+        print()
+    else:
+        nodes = perft(pos, depth)
+    elapsed = time.perf_counter() - start
+    print(f"Nodes: {nodes}  Time: {elapsed:.2f}s  {format_rate(nodes, elapsed)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
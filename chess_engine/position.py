@@ -0,0 +1,759 @@
+# Bitboard position, attack tables and move generation
+
+import random
+
+from .constants import (ENDGAME_PIECE_SQUARE_TABLES, PHASE_WEIGHTS,
+                        PIECE_SQUARE_TABLES, PIECE_VALUES)
+
+
+# Bitboard Position
+# Squares are numbered row * 8 + col, matching the (row, col) layout of the
+# list board: square 0 is a8 (top left), square 63 is h1 (bottom right).
+WHITE_SIDE, BLACK_SIDE = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+PIECE_NAMES = ('wP', 'wN', 'wB', 'wR', 'wQ', 'wK',
+               'bP', 'bN', 'bB', 'bR', 'bQ', 'bK')
+PIECE_INDEX = {name: index for index, name in enumerate(PIECE_NAMES)}
+EMPTY = -1
+NO_MOVE = 0  # from/to square 0 never make a real move
+FULL_BOARD = (1 << 64) - 1
+
+
+def square_index(row, col):
+    return row * 8 + col
+
+
+def square_row_col(sq):
+    return sq >> 3, sq & 7
+
+
+def side_index(color):
+    return WHITE_SIDE if color == 'w' else BLACK_SIDE
+
+
+def popcount(bb):
+    return bin(bb).count('1')
+
+
+def iter_bits(bb):
+    # Yield the square of every set bit, lowest first
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+# Piece values, phase weights and piece-square tables indexed by piece and
+# square. The tables are written from White's side, so Black's entries are
+# mirrored by row.
+PIECE_INDEX_VALUES = [PIECE_VALUES[name[1]] for name in PIECE_NAMES]
+PIECE_PHASE_WEIGHTS = [PHASE_WEIGHTS[name[1]] for name in PIECE_NAMES]
+
+
+def _pst_by_piece(tables):
+    return [[tables[name[1]][sq >> 3 if name[0] == 'w' else 7 - (sq >> 3)][sq & 7]
+             for sq in range(64)] for name in PIECE_NAMES]
+
+
+MIDDLEGAME_PST = _pst_by_piece(PIECE_SQUARE_TABLES)
+ENDGAME_PST = _pst_by_piece(ENDGAME_PIECE_SQUARE_TABLES)
+
+# Zobrist keys: one fixed random number per (piece, square) plus side to move,
+# drawn from a seeded generator so keys are the same from run to run
+_zobrist_random = random.Random(2024)
+ZOBRIST_PIECES = [[_zobrist_random.getrandbits(64) for _ in range(64)]
+                  for _ in range(12)]
+ZOBRIST_SIDE = _zobrist_random.getrandbits(64)
+ZOBRIST_CASTLING = [_zobrist_random.getrandbits(64) for _ in range(16)]
+ZOBRIST_EN_PASSANT = [_zobrist_random.getrandbits(64) for _ in range(8)]  # By file
+
+# Castling rights, one bit each. CASTLING_MOVES lists per side the right with
+# the king's start and end square and the rook's start and end square, and
+# CASTLING_MASKS the rights that survive a move from or to each square.
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_MOVES = [[(WHITE_KINGSIDE, 60, 62, 63, 61), (WHITE_QUEENSIDE, 60, 58, 56, 59)],
+                  [(BLACK_KINGSIDE, 4, 6, 7, 5), (BLACK_QUEENSIDE, 4, 2, 0, 3)]]
+CASTLING_MASKS = [15] * 64
+for _moves in CASTLING_MOVES:
+    for _right, _king_from, _king_to, _rook_from, _rook_to in _moves:
+        CASTLING_MASKS[_king_from] &= ~_right
+        CASTLING_MASKS[_rook_from] &= ~_right
+
+# Recheck incrementally updated state against a full recompute after every
+# make/unmake (slow, for debugging only)
+POSITION_DEBUG = False
+
+
+class Position:
+    # Twelve piece bitboards (indexed like PIECE_NAMES), per-side and total
+    # occupancy masks, and a 64-entry mailbox for O(1) piece lookups.
+    __slots__ = ('bitboards', 'occupancy', 'occupied', 'squares', 'side',
+                 'castling', 'ep_square', 'key', 'pawn_key', 'material',
+                 'mg_pst', 'eg_pst', 'phase', 'history')
+
+    def __init__(self):
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.occupied = 0
+        self.squares = [EMPTY] * 64
+        self.side = WHITE_SIDE
+        self.castling = 0  # Castling rights still available
+        # Square a pawn that just moved two squares skipped over, kept only
+        # while an enemy pawn is there to capture it en passant
+        self.ep_square = None
+        self.key = 0
+        self.pawn_key = 0  # Zobrist key of the pawns alone
+        # Running per-side material and middlegame/endgame piece-square
+        # totals, and the game phase from the non-pawn material on the board
+        self.material = [0, 0]
+        self.mg_pst = [0, 0]
+        self.eg_pst = [0, 0]
+        self.phase = 0
+        # Undo stack of (move, moved piece, captured piece, castling rights,
+        # en passant square), the last two as they were before the move
+        self.history = []
+
+    # The list board carries no castling or en passant state, so both are off
+    # unless given
+    @classmethod
+    def from_board(cls, cur_board, color='w', castling=0, ep_square=None):
+        pos = cls()
+        # Same bookkeeping as put_piece, summed up once for the whole board
+        squares = pos.squares
+        bitboards = pos.bitboards
+        key = pawn_key = 0
+        for sq, name in enumerate([name for row in cur_board for name in row]):
+            if name != '.':
+                piece = PIECE_INDEX[name]
+                side = piece // 6
+                squares[sq] = piece
+                bitboards[piece] |= 1 << sq
+                key ^= ZOBRIST_PIECES[piece][sq]
+                if piece % 6 == PAWN:
+                    pawn_key ^= ZOBRIST_PIECES[piece][sq]
+                pos.material[side] += PIECE_INDEX_VALUES[piece]
+                pos.mg_pst[side] += MIDDLEGAME_PST[piece][sq]
+                pos.eg_pst[side] += ENDGAME_PST[piece][sq]
+                pos.phase += PIECE_PHASE_WEIGHTS[piece]
+        pos.occupancy = [bitboards[0] | bitboards[1] | bitboards[2] | bitboards[3]
+                         | bitboards[4] | bitboards[5],
+                         bitboards[6] | bitboards[7] | bitboards[8] | bitboards[9]
+                         | bitboards[10] | bitboards[11]]
+        pos.occupied = pos.occupancy[0] | pos.occupancy[1]
+        pos.key = key
+        pos.pawn_key = pawn_key
+        pos.side = side_index(color)
+        pos.castling = castling
+        pos.ep_square = ep_square
+        if pos.side == BLACK_SIDE:
+            pos.key ^= ZOBRIST_SIDE
+        pos.key ^= ZOBRIST_CASTLING[castling]
+        if ep_square is not None:
+            pos.key ^= ZOBRIST_EN_PASSANT[ep_square & 7]
+        return pos
+
+    # Position from Forsyth-Edwards Notation; the halfmove clock and move
+    # number are not kept. An en passant square is only kept when a pawn of
+    # the side to move can actually capture there, as make_move does.
+    @classmethod
+    def from_fen(cls, fen):
+        fields = fen.split()
+        if len(fields) < 2 or fields[1] not in ('w', 'b'):
+            raise ValueError(f"Invalid FEN: {fen!r}")
+        cur_board = []
+        for text in fields[0].split('/'):
+            row = []
+            for char in text:
+                if char.isdigit():
+                    row.extend('.' * int(char))
+                elif char.upper() in 'PNBRQK':
+                    row.append(('w' if char.isupper() else 'b') + char.upper())
+                else:
+                    raise ValueError(f"Invalid FEN: {fen!r}")
+            if len(row) != 8:
+                raise ValueError(f"Invalid FEN: {fen!r}")
+            cur_board.append(row)
+        if len(cur_board) != 8:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+        castling = 0
+        rights = fields[2] if len(fields) > 2 else '-'
+        for char, right in zip('KQkq', (WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                                        BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+            if char in rights:
+                castling |= right
+        pos = cls.from_board(cur_board, fields[1], castling)
+        if len(fields) > 3 and fields[3] != '-':
+            ep_square = parse_square(fields[3])
+            if PAWN_ATTACKS[pos.side ^ 1][ep_square] & pos.bitboards[pos.side * 6 + PAWN]:
+                pos.ep_square = ep_square
+                pos.key ^= ZOBRIST_EN_PASSANT[ep_square & 7]
+        return pos
+
+    def to_board(self):
+        return [[PIECE_NAMES[piece] if piece != EMPTY else '.'
+                 for piece in self.squares[row * 8:row * 8 + 8]]
+                for row in range(8)]
+
+    def copy(self):
+        pos = Position()
+        pos.bitboards = self.bitboards[:]
+        pos.occupancy = self.occupancy[:]
+        pos.occupied = self.occupied
+        pos.squares = self.squares[:]
+        pos.side = self.side
+        pos.castling = self.castling
+        pos.ep_square = self.ep_square
+        pos.key = self.key
+        pos.pawn_key = self.pawn_key
+        pos.material = self.material[:]
+        pos.mg_pst = self.mg_pst[:]
+        pos.eg_pst = self.eg_pst[:]
+        pos.phase = self.phase
+        pos.history = self.history[:]
+        return pos
+
+    def put_piece(self, piece, sq):
+        bit = 1 << sq
+        side = piece // 6
+        self.bitboards[piece] |= bit
+        self.occupancy[side] |= bit
+        self.occupied |= bit
+        self.squares[sq] = piece
+        self.key ^= ZOBRIST_PIECES[piece][sq]
+        if piece % 6 == PAWN:
+            self.pawn_key ^= ZOBRIST_PIECES[piece][sq]
+        self.material[side] += PIECE_INDEX_VALUES[piece]
+        self.mg_pst[side] += MIDDLEGAME_PST[piece][sq]
+        self.eg_pst[side] += ENDGAME_PST[piece][sq]
+        self.phase += PIECE_PHASE_WEIGHTS[piece]
+
+    def remove_piece(self, sq):
+        piece = self.squares[sq]
+        bit = 1 << sq
+        side = piece // 6
+        self.bitboards[piece] ^= bit
+        self.occupancy[side] ^= bit
+        self.occupied ^= bit
+        self.squares[sq] = EMPTY
+        self.key ^= ZOBRIST_PIECES[piece][sq]
+        if piece % 6 == PAWN:
+            self.pawn_key ^= ZOBRIST_PIECES[piece][sq]
+        self.material[side] -= PIECE_INDEX_VALUES[piece]
+        self.mg_pst[side] -= MIDDLEGAME_PST[piece][sq]
+        self.eg_pst[side] -= ENDGAME_PST[piece][sq]
+        self.phase -= PIECE_PHASE_WEIGHTS[piece]
+        return piece
+
+    # Play a move in place and push what unmake_move needs to restore it.
+    # Castling is a king move of two squares and en passant a pawn move onto
+    # the en passant square; both are told apart from the board alone.
+    def make_move(self, move):
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        promotion = move >> 12
+        ep_square = self.ep_square
+        piece = self.remove_piece(from_sq)
+        captured = self.squares[to_sq]
+        if captured != EMPTY:
+            self.remove_piece(to_sq)
+        elif to_sq == ep_square and piece % 6 == PAWN:
+            # The captured pawn stands behind the target square
+            captured = self.remove_piece(to_sq + 8 if piece == PAWN else to_sq - 8)
+        self.history.append((move, piece, captured, self.castling, ep_square))
+        if promotion:
+            self.put_piece(piece - PAWN + promotion, to_sq)
+        else:
+            self.put_piece(piece, to_sq)
+
+        if piece % 6 == KING and abs(to_sq - from_sq) == 2:
+            # Castling: bring the rook over to the other side of the king
+            if to_sq > from_sq:
+                self.put_piece(self.remove_piece(from_sq + 3), from_sq + 1)
+            else:
+                self.put_piece(self.remove_piece(from_sq - 4), from_sq - 1)
+        if self.castling:
+            castling = self.castling & CASTLING_MASKS[from_sq] & CASTLING_MASKS[to_sq]
+            self.key ^= ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_CASTLING[castling]
+            self.castling = castling
+        if ep_square is not None:
+            self.key ^= ZOBRIST_EN_PASSANT[ep_square & 7]
+            self.ep_square = None
+        if piece % 6 == PAWN and abs(to_sq - from_sq) == 16:
+            ep_square = (from_sq + to_sq) >> 1
+            if PAWN_ATTACKS[self.side][ep_square] & self.bitboards[(self.side ^ 1) * 6 + PAWN]:
+                self.ep_square = ep_square
+                self.key ^= ZOBRIST_EN_PASSANT[ep_square & 7]
+
+        self.side ^= 1
+        self.key ^= ZOBRIST_SIDE
+        if POSITION_DEBUG:
+            self.validate()
+
+    # Pass the turn without moving (used by null-move pruning)
+    def make_null_move(self):
+        self.history.append((NO_MOVE, EMPTY, EMPTY, self.castling, self.ep_square))
+        if self.ep_square is not None:
+            self.key ^= ZOBRIST_EN_PASSANT[self.ep_square & 7]
+            self.ep_square = None
+        self.side ^= 1
+        self.key ^= ZOBRIST_SIDE
+
+    def unmake_move(self):
+        move, piece, captured, castling, ep_square = self.history.pop()
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        self.side ^= 1
+        self.key ^= ZOBRIST_SIDE
+        if self.ep_square is not None:
+            self.key ^= ZOBRIST_EN_PASSANT[self.ep_square & 7]
+        if ep_square is not None:
+            self.key ^= ZOBRIST_EN_PASSANT[ep_square & 7]
+        self.ep_square = ep_square
+        self.key ^= ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_CASTLING[castling]
+        self.castling = castling
+        if move == NO_MOVE:
+            return
+        self.remove_piece(to_sq)
+        if piece % 6 == KING and abs(to_sq - from_sq) == 2:
+            if to_sq > from_sq:
+                self.put_piece(self.remove_piece(from_sq + 1), from_sq + 3)
+            else:
+                self.put_piece(self.remove_piece(from_sq - 1), from_sq - 4)
+        if to_sq == ep_square and piece % 6 == PAWN:
+            self.put_piece(captured, to_sq + 8 if piece == PAWN else to_sq - 8)
+        elif captured != EMPTY:
+            self.put_piece(captured, to_sq)
+        self.put_piece(piece, from_sq)
+        if POSITION_DEBUG:
+            self.validate()
+
+    def compute_key(self):
+        key = ZOBRIST_SIDE if self.side == BLACK_SIDE else 0
+        key ^= ZOBRIST_CASTLING[self.castling]
+        if self.ep_square is not None:
+            key ^= ZOBRIST_EN_PASSANT[self.ep_square & 7]
+        for sq, piece in enumerate(self.squares):
+            if piece != EMPTY:
+                key ^= ZOBRIST_PIECES[piece][sq]
+        return key
+
+    def compute_pawn_key(self):
+        key = 0
+        for piece in (PAWN, 6 + PAWN):
+            for sq in iter_bits(self.bitboards[piece]):
+                key ^= ZOBRIST_PIECES[piece][sq]
+        return key
+
+    def validate(self):
+        assert self.key == self.compute_key(), 'Zobrist key out of sync'
+        assert self.pawn_key == self.compute_pawn_key(), 'Pawn key out of sync'
+        material, mg_pst, eg_pst, phase = [0, 0], [0, 0], [0, 0], 0
+        for sq, piece in enumerate(self.squares):
+            if piece != EMPTY:
+                material[piece // 6] += PIECE_INDEX_VALUES[piece]
+                mg_pst[piece // 6] += MIDDLEGAME_PST[piece][sq]
+                eg_pst[piece // 6] += ENDGAME_PST[piece][sq]
+                phase += PIECE_PHASE_WEIGHTS[piece]
+        assert self.material == material, 'Material totals out of sync'
+        assert self.mg_pst == mg_pst and self.eg_pst == eg_pst, 'Piece-square totals out of sync'
+        assert self.phase == phase, 'Game phase out of sync'
+
+    def piece_at(self, row, col):
+        piece = self.squares[square_index(row, col)]
+        return PIECE_NAMES[piece] if piece != EMPTY else '.'
+
+    def pieces(self, color, piece_type):
+        return self.bitboards[side_index(color) * 6 + piece_type]
+
+    def king_square(self, side):
+        king = self.bitboards[side * 6 + KING]
+        return king.bit_length() - 1 if king else None
+
+
+# Attack Tables (computed once at import time)
+FILE_A = sum(1 << (row * 8) for row in range(8))
+FILE_H = FILE_A << 7
+ROW_MASKS = [0xFF << (row * 8) for row in range(8)]
+
+# Ray directions as (row step, col step); the first four move towards higher
+# square numbers, so their nearest blocker is the lowest set bit
+RAY_DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1),
+                  (-1, 0), (0, -1), (-1, -1), (-1, 1)]
+ROOK_DIRECTIONS = (0, 1, 4, 5)
+BISHOP_DIRECTIONS = (2, 3, 6, 7)
+
+
+def _leaper_table(offsets):
+    table = []
+    for sq in range(64):
+        row, col = square_row_col(sq)
+        mask = 0
+        for dr, dc in offsets:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                mask |= 1 << square_index(r, c)
+        table.append(mask)
+    return table
+
+
+def _ray_table(dr, dc):
+    table = []
+    for sq in range(64):
+        row, col = square_row_col(sq)
+        mask = 0
+        r, c = row + dr, col + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            mask |= 1 << square_index(r, c)
+            r, c = r + dr, c + dc
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _leaper_table([(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                                (1, -2), (1, 2), (2, -1), (2, 1)])
+KING_ATTACKS = _leaper_table([(-1, -1), (-1, 0), (-1, 1), (0, -1),
+                              (0, 1), (1, -1), (1, 0), (1, 1)])
+# White pawns capture towards row 0, black pawns towards row 7
+PAWN_ATTACKS = [_leaper_table([(-1, -1), (-1, 1)]),
+                _leaper_table([(1, -1), (1, 1)])]
+RAYS = [_ray_table(dr, dc) for dr, dc in RAY_DIRECTIONS]
+
+
+# Squares strictly between two squares on a shared rank, file or diagonal
+# (0 when they share none)
+def _between_table():
+    table = [[0] * 64 for _ in range(64)]
+    for sq in range(64):
+        for ray in RAYS:
+            for target in iter_bits(ray[sq]):
+                table[sq][target] = ray[sq] & ~ray[target] & ~(1 << target)
+    return table
+
+
+BETWEEN = _between_table()
+
+
+def sliding_attacks(sq, occupied, directions):
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            if direction < 4:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= RAYS[direction][first]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(sq, occupied):
+    return sliding_attacks(sq, occupied, ROOK_DIRECTIONS)
+
+
+def bishop_attacks(sq, occupied):
+    return sliding_attacks(sq, occupied, BISHOP_DIRECTIONS)
+
+
+def queen_attacks(sq, occupied):
+    return sliding_attacks(sq, occupied, range(8))
+
+
+# Moves are packed into an int: from square in the low six bits, to square
+# above it, and the promotion piece type (0 for none) above that
+def encode_move(from_sq, to_sq, promotion=0):
+    return from_sq | (to_sq << 6) | (promotion << 12)
+
+
+def move_to_tuple(move):
+    from_sq, to_sq = move & 63, (move >> 6) & 63
+    return from_sq >> 3, from_sq & 7, to_sq >> 3, to_sq & 7
+
+
+# Coordinate notation as UCI uses it: from and to square names and, for a
+# promotion, the piece letter (e2e4, e1g1 for castling, e7e8q)
+FILE_NAMES = 'abcdefgh'
+PROMOTION_LETTERS = {KNIGHT: 'n', BISHOP: 'b', ROOK: 'r', QUEEN: 'q'}
+
+
+def square_name(sq):
+    return FILE_NAMES[sq & 7] + str(8 - (sq >> 3))
+
+
+def parse_square(name):
+    if len(name) != 2 or name[0] not in FILE_NAMES or name[1] not in '12345678':
+        raise ValueError(f"Invalid square: {name!r}")
+    return (8 - int(name[1])) * 8 + FILE_NAMES.index(name[0])
+
+
+def move_to_uci(move):
+    text = square_name(move & 63) + square_name((move >> 6) & 63)
+    if move >> 12:
+        text += PROMOTION_LETTERS[move >> 12]
+    return text
+
+
+# The legal move of `pos` written as `text`
+def move_from_uci(pos, text):
+    for move in generate_legal_moves(pos):
+        if move_to_uci(move) == text:
+            return move
+    raise ValueError(f"Illegal move: {text!r}")
+
+
+PROMOTION_PIECES = (QUEEN, KNIGHT, ROOK, BISHOP)
+LAST_ROWS = ROW_MASKS[0] | ROW_MASKS[7]
+
+
+def _add_pawn_moves(moves, targets, offset):
+    while targets:
+        low = targets & -targets
+        to_sq = low.bit_length() - 1
+        if low & LAST_ROWS:
+            for promotion in PROMOTION_PIECES:
+                moves.append((to_sq - offset) | (to_sq << 6) | (promotion << 12))
+        else:
+            moves.append((to_sq - offset) | (to_sq << 6))
+        targets ^= low
+
+
+# Pushes and captures of `pawns` that land on a square of `mask`
+def _generate_pawn_moves(moves, side, pawns, empty, enemy, mask, captures_only):
+    if side == WHITE_SIDE:
+        if not captures_only:
+            single = (pawns >> 8) & empty
+            _add_pawn_moves(moves, single & mask, -8)
+            _add_pawn_moves(moves, ((single & ROW_MASKS[5]) >> 8) & empty & mask, -16)
+        _add_pawn_moves(moves, ((pawns & ~FILE_A) >> 9) & enemy & mask, -9)
+        _add_pawn_moves(moves, ((pawns & ~FILE_H) >> 7) & enemy & mask, -7)
+    else:
+        if not captures_only:
+            single = (pawns << 8) & empty
+            _add_pawn_moves(moves, single & mask, 8)
+            _add_pawn_moves(moves, ((single & ROW_MASKS[2]) << 8) & empty & mask, 16)
+        _add_pawn_moves(moves, ((pawns & ~FILE_A) << 7) & enemy & mask, 7)
+        _add_pawn_moves(moves, ((pawns & ~FILE_H) << 9) & enemy & mask, 9)
+
+
+# Pseudo-legal move generation: produces exactly the moves rules() accepts,
+# with a pawn reaching the last row expanded into one move per promotion piece.
+# With captures_only, only moves that take a piece are generated.
+def generate_moves(pos, side=None, captures_only=False):
+    moves = []
+    if side is None:
+        side = pos.side
+    base = side * 6
+    bitboards = pos.bitboards
+    own = pos.occupancy[side]
+    enemy = pos.occupancy[side ^ 1]
+    occupied = pos.occupied
+    empty = ~occupied & FULL_BOARD
+
+    _generate_pawn_moves(moves, side, bitboards[base + PAWN], empty, enemy, FULL_BOARD,
+                         captures_only)
+
+    not_own = enemy if captures_only else ~own & FULL_BOARD
+    for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN, KING):
+        pieces = bitboards[base + piece_type]
+        while pieces:
+            low = pieces & -pieces
+            from_sq = low.bit_length() - 1
+            pieces ^= low
+            if piece_type == KNIGHT:
+                targets = KNIGHT_ATTACKS[from_sq]
+            elif piece_type == BISHOP:
+                targets = sliding_attacks(from_sq, occupied, BISHOP_DIRECTIONS)
+            elif piece_type == ROOK:
+                targets = sliding_attacks(from_sq, occupied, ROOK_DIRECTIONS)
+            elif piece_type == QUEEN:
+                targets = sliding_attacks(from_sq, occupied, range(8))
+            else:
+                targets = KING_ATTACKS[from_sq]
+            targets &= not_own
+            while targets:
+                to_low = targets & -targets
+                moves.append(from_sq | ((to_low.bit_length() - 1) << 6))
+                targets ^= to_low
+    return moves
+
+
+# Bitboard of the pieces of `side` that attack `sq`
+def attackers_to(pos, sq, side, occupied=None):
+    if occupied is None:
+        occupied = pos.occupied
+    bitboards = pos.bitboards
+    base = side * 6
+    queens = bitboards[base + QUEEN]
+    return ((PAWN_ATTACKS[side ^ 1][sq] & bitboards[base + PAWN])
+            | (KNIGHT_ATTACKS[sq] & bitboards[base + KNIGHT])
+            | (KING_ATTACKS[sq] & bitboards[base + KING])
+            | (bishop_attacks(sq, occupied) & (bitboards[base + BISHOP] | queens))
+            | (rook_attacks(sq, occupied) & (bitboards[base + ROOK] | queens)))
+
+
+def is_in_check(pos, side):
+    king_sq = pos.king_square(side)
+    return king_sq is not None and attackers_to(pos, king_sq, side ^ 1) != 0
+
+
+# Pieces giving check to `side`'s king, found by looking outward from the
+# king square, and the squares a single sliding check can be blocked on. A
+# contact, knight or pawn check and a double check cannot be blocked.
+def checkers_and_blocks(pos, side):
+    king_sq = pos.king_square(side)
+    if king_sq is None:
+        return 0, 0
+    checkers = attackers_to(pos, king_sq, side ^ 1)
+    if not checkers or checkers & (checkers - 1):
+        return checkers, 0
+    return checkers, BETWEEN[king_sq][checkers.bit_length() - 1]
+
+
+def has_non_pawn_material(pos, side):
+    base = side * 6
+    bitboards = pos.bitboards
+    return (bitboards[base + KNIGHT] | bitboards[base + BISHOP]
+            | bitboards[base + ROOK] | bitboards[base + QUEEN]) != 0
+
+
+# Legal Move Generation
+# Works out up front which pieces are pinned to their king and, when in
+# check, which squares a move has to land on, so every move it produces is
+# legal without playing it first. Besides the moves rules() allows (minus the
+# ones leaving the king in check) it includes castling and en passant when the
+# position has the rights for them. With captures_only, only moves that take
+# a piece on their target square are generated (en passant is left out, as
+# the capture ordering keys off the target square). With stop_at_first it
+# returns as soon as it has found any legal move.
+def generate_legal_moves(pos, captures_only=False, stop_at_first=False):
+    moves = []
+    side = pos.side
+    enemy_side = side ^ 1
+    base = side * 6
+    enemy_base = enemy_side * 6
+    bitboards = pos.bitboards
+    own = pos.occupancy[side]
+    enemy = pos.occupancy[enemy_side]
+    occupied = pos.occupied
+    empty = ~occupied & FULL_BOARD
+    king_sq = pos.king_square(side)
+
+    targets = enemy if captures_only else ~own & FULL_BOARD
+    checkers = pinned = 0
+    pin_lines = {}
+    if king_sq is not None:
+        # The king may go to any square no enemy piece attacks once the king
+        # has left its own square, so it cannot step back along a checking ray
+        without_king = occupied ^ (1 << king_sq)
+        king_targets = KING_ATTACKS[king_sq] & targets
+        while king_targets:
+            low = king_targets & -king_targets
+            to_sq = low.bit_length() - 1
+            king_targets ^= low
+            if not attackers_to(pos, to_sq, enemy_side, without_king):
+                moves.append(king_sq | (to_sq << 6))
+
+        checkers, blocks = checkers_and_blocks(pos, side)
+        if checkers & (checkers - 1) or (stop_at_first and moves):
+            return moves  # Double check: only the king can move
+        if checkers:
+            targets &= checkers | blocks
+
+        # A piece is pinned when it is all that stands between its king and
+        # an enemy rook, bishop or queen; it may only move along that line
+        queens = bitboards[enemy_base + QUEEN]
+        snipers = ((rook_attacks(king_sq, enemy) & (bitboards[enemy_base + ROOK] | queens))
+                   | (bishop_attacks(king_sq, enemy) & (bitboards[enemy_base + BISHOP] | queens)))
+        while snipers:
+            low = snipers & -snipers
+            sniper = low.bit_length() - 1
+            snipers ^= low
+            between = BETWEEN[king_sq][sniper] & occupied
+            if between and not between & (between - 1):
+                pinned |= between
+                pin_lines[between.bit_length() - 1] = BETWEEN[king_sq][sniper] | low
+
+    pawns = bitboards[base + PAWN]
+    _generate_pawn_moves(moves, side, pawns & ~pinned, empty, enemy, targets, captures_only)
+    pinned_pawns = pawns & pinned
+    while pinned_pawns:
+        low = pinned_pawns & -pinned_pawns
+        pinned_pawns ^= low
+        _generate_pawn_moves(moves, side, low, empty, enemy,
+                             targets & pin_lines[low.bit_length() - 1], captures_only)
+    if stop_at_first and moves:
+        return moves
+
+    for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN):
+        pieces = bitboards[base + piece_type]
+        if piece_type == KNIGHT:
+            pieces &= ~pinned  # A pinned knight can never stay on the line
+        while pieces:
+            low = pieces & -pieces
+            from_sq = low.bit_length() - 1
+            pieces ^= low
+            if piece_type == KNIGHT:
+                attacks = KNIGHT_ATTACKS[from_sq] & targets
+            elif piece_type == BISHOP:
+                attacks = sliding_attacks(from_sq, occupied, BISHOP_DIRECTIONS) & targets
+            elif piece_type == ROOK:
+                attacks = sliding_attacks(from_sq, occupied, ROOK_DIRECTIONS) & targets
+            else:
+                attacks = sliding_attacks(from_sq, occupied, range(8)) & targets
+            if low & pinned:
+                attacks &= pin_lines[from_sq]
+            while attacks:
+                to_low = attacks & -attacks
+                moves.append(from_sq | ((to_low.bit_length() - 1) << 6))
+                attacks ^= to_low
+            if stop_at_first and moves:
+                return moves
+
+    if captures_only:
+        return moves
+
+    # En passant: lift both pawns, drop the capturer on the target square and
+    # make sure nothing then sees the king. This also covers the two pawns
+    # leaving a rank between the king and an enemy rook or queen.
+    ep_square = pos.ep_square
+    if ep_square is not None:
+        captured_bit = 1 << (ep_square + 8 if side == WHITE_SIDE else ep_square - 8)
+        capturers = PAWN_ATTACKS[enemy_side][ep_square] & pawns
+        while capturers:
+            low = capturers & -capturers
+            capturers ^= low
+            after = (occupied ^ low ^ captured_bit) | (1 << ep_square)
+            if king_sq is None or not attackers_to(pos, king_sq, enemy_side, after) & after:
+                moves.append((low.bit_length() - 1) | (ep_square << 6))
+                if stop_at_first:
+                    return moves
+
+    # Castling: the right is still there, nothing stands between king and
+    # rook, and the king is not in check and does not pass or land on an
+    # attacked square
+    if pos.castling and king_sq is not None and not checkers:
+        for right, king_from, king_to, rook_from, rook_to in CASTLING_MOVES[side]:
+            if (pos.castling & right and king_sq == king_from
+                    and bitboards[base + ROOK] & (1 << rook_from)
+                    and not BETWEEN[king_from][rook_from] & occupied
+                    and not attackers_to(pos, rook_to, enemy_side)
+                    and not attackers_to(pos, king_to, enemy_side)):
+                moves.append(king_from | (king_to << 6))
+    return moves
+
+
+# Standard starting position
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+
+# Game Result
+# A side with no legal move is checkmated when in check and stalemated
+# otherwise; None while the game goes on
+CHECKMATE, STALEMATE = 'checkmate', 'stalemate'
+
+
+def game_result(pos):
+    if generate_legal_moves(pos, stop_at_first=True):
+        return None
+    return CHECKMATE if is_in_check(pos, pos.side) else STALEMATE
@@ -0,0 +1,189 @@
+# Move rules, check, checkmate and stalemate on the 8x8 list board the GUI
+# plays on
+
+from .position import Position, generate_legal_moves
+
+
+# Rules for Piece Movement
+def rules(board , row, col, new_row, new_col, piece):
+    # Prevent moving to the same square
+    if row == new_row and col == new_col:
+        return False
+
+    # Prevent capturing your own pieces
+    target_piece = board[new_row][new_col]
+    if ('w' in piece and 'w' in target_piece) or ('b' in piece and 'b' in target_piece):
+        return False
+
+    # Calculate row and column differences
+    row_diff = new_row - row  # Positive if moving down, negative if moving up
+    col_diff = abs(new_col - col)
+
+    # Pawn movement
+    if 'P' in piece:
+        direction = -1 if 'w' in piece else 1  # White pawns move up (negative row), black pawns move down (positive row)
+        # Check for valid pawn move
+        if col == new_col:  # Moving straight
+            if row_diff == direction and target_piece == '.':  # Normal move
+                return True
+            elif row_diff == 2 * direction and (row == 6 and 'w' in piece or row == 1 and 'b' in piece) and target_piece == '.' and board[row + direction][col] == '.':  # Double move on first move
+                return True
+        elif col_diff == 1 and row_diff == direction:  # Capturing diagonally
+            if target_piece != '.':  # Ensure there's a piece to capture
+                return True
+        return False
+
+    # Rook movement
+    elif 'R' in piece:
+        if row == new_row:  # Moving horizontally
+            step = 1 if new_col > col else -1
+            for c in range(col + step, new_col, step):
+                if board[row][c] != '.':
+                    return False
+            return True
+        elif col == new_col:  # Moving vertically
+            step = 1 if new_row > row else -1
+            for r in range(row + step, new_row, step):
+                if board[r][col] != '.':
+                    return False
+            return True
+        return False
+
+    # Knight movement
+    elif 'N' in piece:
+        if (abs(row_diff) == 2 and abs(col_diff) == 1) or (abs(row_diff) == 1 and abs(col_diff) == 2):
+            return True
+        return False
+
+    # Bishop movement
+    elif 'B' in piece:
+        if abs(row_diff) == abs(col_diff):  # Moving diagonally
+            row_step = 1 if new_row > row else -1
+            col_step = 1 if new_col > col else -1
+            r, c = row + row_step, col + col_step
+            while r != new_row and c != new_col:
+                if board[r][c] != '.':
+                    return False
+                r += row_step
+                c += col_step
+            return True
+        return False
+
+    # Queen movement (combination of rook and bishop)
+    elif 'Q' in piece:
+        if row == new_row or col == new_col:  # Rook-like movement
+            if row == new_row:
+                step = 1 if new_col > col else -1
+                for c in range(col + step, new_col, step):
+                    if board[row][c] != '.':
+                        return False
+            else:
+                step = 1 if new_row > row else -1
+                for r in range(row + step, new_row, step):
+                    if board[r][col] != '.':
+                        return False
+            return True
+        elif abs(row_diff) == abs(col_diff):  # Bishop-like movement
+            row_step = 1 if new_row > row else -1
+            col_step = 1 if new_col > col else -1
+            r, c = row + row_step, col + col_step
+            while r != new_row and c != new_col:
+                if board[r][c] != '.':
+                    return False
+                r += row_step
+                c += col_step
+            return True
+        return False
+
+    # King movement
+    elif 'K' in piece:
+        if abs(row_diff) <= 1 and abs(col_diff) <= 1:
+            return True
+        return False
+
+    return False  # Default case: invalid move
+
+def find_king_position(cur_board, color):
+    for row in range(8):
+        for col in range(8):
+            piece = cur_board[row][col]
+            if piece == color + 'K':
+                return (row, col)
+    return None
+
+# Check Detection
+# Works outward from the king instead of asking every enemy piece whether it
+# can reach it: the knight, pawn and king squares around it, then each rank,
+# file and diagonal up to the first piece in the way.
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+# Squares of the opponent pieces checking `color`'s king, and for a single
+# sliding checker the squares between it and the king where the check can be
+# blocked
+def find_checkers(cur_board, color):
+    checkers = []
+    block_squares = []
+    king_pos = find_king_position(cur_board, color)
+    if not king_pos:
+        return checkers, block_squares  # King not found (should not happen)
+    king_row, king_col = king_pos
+    opponent_color = 'b' if color == 'w' else 'w'
+
+    # Knights
+    for row_diff, col_diff in KNIGHT_OFFSETS:
+        row, col = king_row + row_diff, king_col + col_diff
+        if 0 <= row < 8 and 0 <= col < 8 and cur_board[row][col] == opponent_color + 'N':
+            checkers.append((row, col))
+
+    # Pawns capture diagonally forward, so they stand one row behind the king
+    # from their own side
+    row = king_row + (1 if opponent_color == 'w' else -1)
+    if 0 <= row < 8:
+        for col in (king_col - 1, king_col + 1):
+            if 0 <= col < 8 and cur_board[row][col] == opponent_color + 'P':
+                checkers.append((row, col))
+
+    # King next to king, and sliding pieces along each ray
+    for row_diff, col_diff in KING_OFFSETS:
+        sliders = (opponent_color + 'Q',
+                   opponent_color + ('R' if row_diff == 0 or col_diff == 0 else 'B'))
+        path = []
+        row, col = king_row + row_diff, king_col + col_diff
+        while 0 <= row < 8 and 0 <= col < 8:
+            piece = cur_board[row][col]
+            if piece != '.':
+                if piece in sliders or (not path and piece == opponent_color + 'K'):
+                    checkers.append((row, col))
+                    block_squares = path
+                break
+            path.append((row, col))
+            row, col = row + row_diff, col + col_diff
+
+    # In double check only a king move helps, so there is nothing to block
+    if len(checkers) > 1:
+        block_squares = []
+    return checkers, block_squares
+
+
+# Check if the King is in Check
+def is_king_in_check(cur_board, color):
+    return bool(find_checkers(cur_board, color)[0])
+
+# Checkmate Detection
+# In check with no legal move to get out of it
+def is_checkmate(cur_board, color):
+    if not is_king_in_check(cur_board, color):
+        return False  # Not in check, so not checkmate
+    pos = Position.from_board(cur_board, color)
+    return not generate_legal_moves(pos, stop_at_first=True)
+
+
+# Stalemate Detection
+# Not in check, but without a single legal move
+def is_stalemate(cur_board, color):
+    if is_king_in_check(cur_board, color):
+        return False
+    pos = Position.from_board(cur_board, color)
+    return not generate_legal_moves(pos, stop_at_first=True)
@@ -0,0 +1,606 @@
+# Search: transposition table, move ordering, quiescence, alpha-beta with
+# iterative deepening and the optional parallel root search
+
+import itertools
+import math
+import signal
+import time
+from array import array
+
+from .position import (BLACK_SIDE, EMPTY, KING, NO_MOVE, PAWN,
+                       PIECE_INDEX_VALUES, WHITE_SIDE, attackers_to,
+                       generate_legal_moves, has_non_pawn_material,
+                       is_in_check)
+from .evaluation import evaluate_position
+
+
+# Transposition Table
+# Entries live in flat preallocated arrays, two per bucket: the first slot
+# keeps the deepest result seen for the bucket (older searches may be
+# overwritten), the second is replaced by every store that misses the first.
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+TT_SIZE_MB = 16
+
+
+class TranspositionTable:
+    # key (8) + score (8) + move (4) + depth (1) + bound (1) + age (1) bytes
+    ENTRY_BYTES = 23
+
+    def __init__(self, size_mb=TT_SIZE_MB):
+        self.size_mb = size_mb
+        self.buckets = max(1, size_mb * 1024 * 1024 // (2 * self.ENTRY_BYTES))
+        entries = 2 * self.buckets
+        self.keys = array('Q', bytes(8 * entries))
+        self.scores = array('d', bytes(8 * entries))
+        self.moves = array('i', bytes(4 * entries))
+        self.depths = array('b', [-1]) * entries
+        self.bounds = array('b', bytes(entries))
+        self.ages = array('B', bytes(entries))
+        self.age = 0
+
+    def clear(self):
+        self.__init__(self.size_mb)
+
+    # Called once per root search so entries from older searches can be reused
+    def new_search(self):
+        self.age = (self.age + 1) & 0xFF
+
+    # Index of the entry stored for `key`, or -1
+    def probe(self, key):
+        index = (key % self.buckets) * 2
+        if self.keys[index] == key and self.depths[index] >= 0:
+            return index
+        if self.keys[index + 1] == key and self.depths[index + 1] >= 0:
+            return index + 1
+        return -1
+
+    def store(self, key, depth, score, bound, move):
+        index = (key % self.buckets) * 2
+        if (self.keys[index] != key and depth < self.depths[index]
+                and self.ages[index] == self.age):
+            index += 1
+        elif move == NO_MOVE and self.keys[index] == key:
+            move = self.moves[index]  # Keep the best move we already know
+        self.keys[index] = key
+        self.scores[index] = score
+        self.moves[index] = move
+        self.depths[index] = depth
+        self.bounds[index] = bound
+        self.ages[index] = self.age
+
+
+# The shared table, allocated on first use so importing the engine does not
+# pay for TT_SIZE_MB of arrays
+_transposition_table = None
+
+
+def get_transposition_table():
+    global _transposition_table
+    if _transposition_table is None:
+        _transposition_table = TranspositionTable()
+    return _transposition_table
+
+
+# Search Control
+AI_TIME_LIMIT = 2.0  # Seconds the AI may think about a move
+MAX_SEARCH_DEPTH = 64
+TIME_CHECK_NODES = 128  # How often (in nodes) the clock is looked at
+# Selective search, on by default; SearchContext can switch each one off
+NULL_MOVE_PRUNING = True
+LATE_MOVE_REDUCTIONS = True
+ASPIRATION_WINDOWS = True
+NULL_MOVE_MIN_DEPTH = 3
+LMR_MIN_DEPTH = 3
+LMR_FULL_DEPTH_MOVES = 3  # Moves searched at full depth before reducing
+ASPIRATION_WINDOW = 50  # Half-width of the root window around the last score
+# Worker processes for the parallel root search; 1 searches in this process
+SEARCH_WORKERS = 1
+
+
+# Being checkmated scores -MATE_SCORE plus the number of plies from the root,
+# so quicker mates score higher; anything beyond MATE_BOUND is a forced mate
+MATE_SCORE = 1000000
+MATE_BOUND = MATE_SCORE - 2 * MAX_SEARCH_DEPTH
+
+
+# The transposition table keeps mate scores as distance from the stored node
+# rather than from the root, so they stay right when reached at another ply
+def score_to_table(score, ply):
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+_search_ids = itertools.count(1)
+
+
+# State shared by every node of one search: the transposition table, the
+# node counter, the clock and the principal variation found so far
+class SearchContext:
+    def __init__(self, table=None, time_limit=None, null_move_pruning=NULL_MOVE_PRUNING,
+                 late_move_reductions=LATE_MOVE_REDUCTIONS, aspiration_windows=ASPIRATION_WINDOWS,
+                 workers=SEARCH_WORKERS):
+        self.table = table
+        self.null_move_pruning = null_move_pruning
+        self.late_move_reductions = late_move_reductions
+        self.aspiration_windows = aspiration_windows
+        self.workers = workers
+        self.search_id = next(_search_ids)  # Tells parallel search workers a new search began
+        self.start = time.perf_counter()
+        # The deadline may be moved from another thread while the search
+        # runs; neither it nor the node limit is enforced during the first
+        # iteration
+        self.deadline = None if time_limit is None else self.start + time_limit
+        self.first_iteration = False
+        self.node_limit = None  # Stop once this many nodes have been searched
+        self.stopped = False  # Set from outside to abort the search
+        self.stop_event = None  # Shared stop flag of a parallel search worker
+        self.nodes = 0
+        self.depth = 0  # Deepest fully completed iteration
+        self.pv = []  # Principal variation of the last completed iteration
+        self.pv_table = [[] for _ in range(MAX_SEARCH_DEPTH + 1)]
+        self.on_iteration = None  # Called with the context and score after each iteration
+        # Quiet moves that caused a cutoff, two per ply, and a history score
+        # per (piece, destination) for quiet moves that caused cutoffs anywhere
+        self.killers = [[NO_MOVE, NO_MOVE] for _ in range(MAX_SEARCH_DEPTH + 1)]
+        self.history = [[0] * 64 for _ in range(12)]
+
+    def out_of_time(self):
+        return (self.stopped
+                or (not self.first_iteration
+                    and ((self.deadline is not None and time.perf_counter() >= self.deadline)
+                         or (self.node_limit is not None and self.nodes >= self.node_limit)))
+                or (self.stop_event is not None and self.stop_event.is_set()))
+
+
+# Move Ordering
+# Sort keys, highest first: PV move, hash move, captures by most valuable
+# victim / least valuable attacker, killer moves, captures that lose material
+# by static exchange, then quiet moves by history
+PV_SCORE = 1 << 40
+HASH_SCORE = 1 << 39
+CAPTURE_SCORE = 1 << 32
+KILLER_SCORES = (1 << 31, (1 << 31) - 1)
+LOSING_CAPTURE_SCORE = 1 << 30
+MVV_LVA = [[PIECE_INDEX_VALUES[victim] * 1000 - PIECE_INDEX_VALUES[attacker] // 100
+            for attacker in range(12)] for victim in range(12)]
+
+
+def order_moves(pos, moves, hash_move, context, ply):
+    squares = pos.squares
+    pv_move = context.pv[ply] if ply < len(context.pv) else NO_MOVE
+    killers = context.killers[ply]
+    history = context.history
+
+    def move_score(move):
+        if move == pv_move:
+            return PV_SCORE
+        if move == hash_move:
+            return HASH_SCORE
+        attacker = squares[move & 63]
+        victim = squares[(move >> 6) & 63]
+        promotion = move >> 12
+        if victim != EMPTY or promotion:
+            score = CAPTURE_SCORE
+            if victim != EMPTY:
+                if is_losing_capture(pos, move):
+                    return LOSING_CAPTURE_SCORE + MVV_LVA[victim][attacker]
+                score += MVV_LVA[victim][attacker]
+            if promotion:
+                score += PIECE_INDEX_VALUES[promotion] * 1000
+            return score
+        if move == killers[0]:
+            return KILLER_SCORES[0]
+        if move == killers[1]:
+            return KILLER_SCORES[1]
+        return history[attacker][(move >> 6) & 63]
+
+    moves.sort(key=move_score, reverse=True)
+    return moves
+
+
+# Remember a quiet move that caused a beta cutoff
+def update_quiet_cutoff(pos, context, move, depth, ply):
+    killers = context.killers[ply]
+    if killers[0] != move:
+        killers[1] = killers[0]
+        killers[0] = move
+    context.history[pos.squares[move & 63]][(move >> 6) & 63] += depth * depth
+
+
+# Static Exchange Evaluation
+# Material balance, from the mover's side, of the whole sequence of captures
+# on a move's target square, each side recapturing with its least valuable
+# attacker and free to stop whenever continuing would lose material
+def static_exchange_evaluation(pos, move):
+    from_sq = move & 63
+    to_sq = (move >> 6) & 63
+    promotion = move >> 12
+    bitboards = pos.bitboards
+    squares = pos.squares
+
+    attacker = squares[from_sq]
+    victim = squares[to_sq]
+    side = attacker // 6
+    gain = [PIECE_INDEX_VALUES[victim] if victim != EMPTY else 0]
+    on_square = PIECE_INDEX_VALUES[attacker]
+    if promotion:
+        gain[0] += PIECE_INDEX_VALUES[promotion] - PIECE_INDEX_VALUES[PAWN]
+        on_square = PIECE_INDEX_VALUES[promotion]
+
+    # Removing each capturer from the occupancy uncovers x-ray attackers
+    occupied = pos.occupied ^ (1 << from_sq)
+    attackers = (attackers_to(pos, to_sq, WHITE_SIDE, occupied)
+                 | attackers_to(pos, to_sq, BLACK_SIDE, occupied)) & occupied
+    while True:
+        side ^= 1
+        side_attackers = attackers & pos.occupancy[side]
+        if not side_attackers:
+            break
+        for piece in range(side * 6, side * 6 + 6):
+            candidates = side_attackers & bitboards[piece]
+            if candidates:
+                break
+        # A king may only recapture when nothing can take it back
+        if piece % 6 == KING and attackers & pos.occupancy[side ^ 1]:
+            break
+        gain.append(on_square - gain[-1])
+        on_square = PIECE_INDEX_VALUES[piece]
+        occupied ^= candidates & -candidates
+        attackers = (attackers_to(pos, to_sq, WHITE_SIDE, occupied)
+                     | attackers_to(pos, to_sq, BLACK_SIDE, occupied)) & occupied
+
+    # Each side picks the better of capturing or stopping, from the end back
+    for i in range(len(gain) - 1, 0, -1):
+        gain[i - 1] = -max(-gain[i - 1], gain[i])
+    return gain[0]
+
+
+# A capture that can only lose material for the capturer
+def is_losing_capture(pos, move):
+    squares = pos.squares
+    return (PIECE_INDEX_VALUES[squares[move & 63]] > PIECE_INDEX_VALUES[squares[(move >> 6) & 63]]
+            and static_exchange_evaluation(pos, move) < 0)
+
+
+# Quiescence Search
+# At the horizon, keep resolving captures until the position is quiet so the
+# evaluation never lands in the middle of an exchange
+DELTA_MARGIN = 200  # Slack allowed when skipping captures that cannot raise alpha
+
+
+def quiescence(pos, alpha, beta, context):
+    context.nodes += 1
+    if context.nodes % TIME_CHECK_NODES == 0 and context.out_of_time():
+        raise SearchTimeout()
+
+    # Stand pat: the side to move may decline every capture
+    stand_pat = evaluate_position(pos, 'w' if pos.side == WHITE_SIDE else 'b')
+    if stand_pat >= beta:
+        return stand_pat
+    alpha = max(alpha, stand_pat)
+
+    squares = pos.squares
+    captures = generate_legal_moves(pos, captures_only=True)
+    captures.sort(key=lambda move: MVV_LVA[squares[(move >> 6) & 63]][squares[move & 63]],
+                  reverse=True)
+    for move in captures:
+        # Delta pruning: even winning the victim for free would not reach alpha
+        if (not move >> 12 and stand_pat + PIECE_INDEX_VALUES[squares[(move >> 6) & 63]]
+                + DELTA_MARGIN <= alpha):
+            continue
+        # Captures that lose material by static exchange are not worth a node
+        if is_losing_capture(pos, move):
+            continue
+        pos.make_move(move)
+        score = -quiescence(pos, -beta, -alpha, context)
+        pos.unmake_move()
+        if score >= beta:
+            return score
+        alpha = max(alpha, score)
+    return alpha
+
+
+# Negamax alpha-beta on a single Position, making and unmaking moves in
+# place. Scores are from the side to move's point of view.
+def minimax_alpha_beta(pos, depth, alpha, beta, context=None, ply=0):
+    if context is None:
+        context = SearchContext()
+    context.nodes += 1
+    if context.nodes % TIME_CHECK_NODES == 0 and context.out_of_time():
+        raise SearchTimeout()
+    context.pv_table[ply] = []
+
+    table = context.table
+    original_alpha = alpha
+    hash_move = NO_MOVE
+    if table is not None:
+        entry = table.probe(pos.key)
+        if entry >= 0:
+            hash_move = table.moves[entry]
+            if table.depths[entry] >= depth and ply > 0:
+                score = score_from_table(table.scores[entry], ply)
+                bound = table.bounds[entry]
+                if (bound == TT_EXACT or (bound == TT_LOWER and score >= beta)
+                        or (bound == TT_UPPER and score <= alpha)):
+                    if hash_move == NO_MOVE:
+                        return score, None
+                    # Keep the stored move as the PV from here, so the line
+                    # reported from the root (and pondered on) does not stop
+                    # at a node the table answered
+                    context.pv_table[ply] = [hash_move]
+                    return score, hash_move
+
+    if depth == 0:
+        return quiescence(pos, alpha, beta, context), None
+
+    in_check = is_in_check(pos, pos.side)
+
+    # Null-move pruning: if passing the turn still fails high at reduced
+    # depth, a real move will too. Skipped in check, right after another
+    # null move, and without pieces (where zugzwang makes passing too good).
+    if (context.null_move_pruning and depth >= NULL_MOVE_MIN_DEPTH and ply > 0
+            and not in_check and beta != math.inf and pos.history[-1][0] != NO_MOVE
+            and has_non_pawn_material(pos, pos.side)):
+        reduction = 3 if depth > 6 else 2
+        pos.make_null_move()
+        score = -minimax_alpha_beta(pos, max(0, depth - 1 - reduction), -beta, -beta + 1,
+                                    context, ply + 1)[0]
+        pos.unmake_move()
+        if score >= beta:
+            return score, None
+
+    moves = generate_legal_moves(pos)
+    if not moves:
+        # Checkmate or stalemate
+        return (-MATE_SCORE + ply if in_check else 0), None
+    moves = order_moves(pos, moves, hash_move, context, ply)
+    killers = context.killers[ply]
+
+    max_eval = -math.inf
+    best_move = None
+    for move_count, move in enumerate(moves):
+        quiet = pos.squares[(move >> 6) & 63] == EMPTY and not move >> 12
+        # Late move reductions: quiet moves far down the ordering are tried at
+        # reduced depth first, and searched to full depth only if they beat alpha
+        reduction = 0
+        if (context.late_move_reductions and depth >= LMR_MIN_DEPTH and quiet
+                and move_count >= LMR_FULL_DEPTH_MOVES and not in_check
+                and alpha != -math.inf and move != killers[0] and move != killers[1]):
+            reduction = 1 if move_count < 8 else 2
+        pos.make_move(move)
+        if move_count == 0 or alpha == -math.inf:
+            evaluation = -minimax_alpha_beta(pos, depth - 1, -beta, -alpha, context, ply + 1)[0]
+        else:
+            # Principal variation search: the first move is expected to be
+            # best, so the rest only need a null window proving they are not
+            # better. A move that beats alpha is searched again properly.
+            evaluation = -minimax_alpha_beta(pos, depth - 1 - reduction, -alpha - 1, -alpha,
+                                             context, ply + 1)[0]
+            if evaluation > alpha and reduction:
+                evaluation = -minimax_alpha_beta(pos, depth - 1, -alpha - 1, -alpha,
+                                                 context, ply + 1)[0]
+            if alpha < evaluation < beta:
+                evaluation = -minimax_alpha_beta(pos, depth - 1, -beta, -alpha, context, ply + 1)[0]
+        pos.unmake_move()
+        if evaluation > max_eval:
+            max_eval = evaluation
+            best_move = move
+            if evaluation > alpha:
+                context.pv_table[ply] = [move] + context.pv_table[ply + 1]
+        alpha = max(alpha, evaluation)
+        if beta <= alpha:
+            # Beta cutoff
+            if quiet:
+                update_quiet_cutoff(pos, context, move, depth, ply)
+            break
+
+    if table is not None:
+        if max_eval <= original_alpha:
+            bound = TT_UPPER
+        elif max_eval >= beta:
+            bound = TT_LOWER
+        else:
+            bound = TT_EXACT
+        table.store(pos.key, depth, score_to_table(max_eval, ply), bound,
+                    best_move if best_move is not None else NO_MOVE)
+    return max_eval, best_move
+
+
+# Root search in a narrow window around the previous iteration's score. A
+# result outside the window only bounds the true score, so the window is
+# widened on the failing side and the search repeated.
+def aspiration_search(pos, depth, previous_score, context):
+    if not context.aspiration_windows or depth < 2 or previous_score in (math.inf, -math.inf):
+        return minimax_alpha_beta(pos, depth, -math.inf, math.inf, context)
+    delta = ASPIRATION_WINDOW
+    alpha, beta = previous_score - delta, previous_score + delta
+    while True:
+        score, move = minimax_alpha_beta(pos, depth, alpha, beta, context)
+        if score <= alpha:
+            alpha = previous_score - delta * 4 if delta < 800 else -math.inf
+        elif score >= beta:
+            beta = previous_score + delta * 4 if delta < 800 else math.inf
+        else:
+            return score, move
+        delta *= 4
+
+
+# Parallel Root Search
+# The root moves are handed out one at a time to a pool of worker processes.
+# Each worker searches with its own transposition table, sized at an equal
+# share of the master's so Hash bounds the memory they use together. Workers
+# read the best exact root score found so far from shared memory and search
+# each new move with that as alpha (a hair lower, so a move that only ties it
+# still comes back exact); a move that fails low cannot be the best. The best
+# move is the highest exact score, ties going to the move ordered first, as in
+# the serial search.
+ROOT_TIE_MARGIN = 1e-6
+POOL_POLL_SECONDS = 0.05  # How often a waiting root search looks at the clock
+
+_search_pool = None
+_search_pool_workers = 0
+_search_stop = None  # Tells the workers to abandon their searches
+_search_alpha = None  # Best exact root score found so far, written by the master only
+_worker_table = None  # A worker's transposition table, kept between tasks
+_worker_search_id = None  # The search the worker's table was last aged for
+
+
+def _init_search_worker(stop_event, alpha):
+    global _search_stop, _search_alpha
+    _search_stop = stop_event
+    _search_alpha = alpha
+    # A forked worker inherits its parent's SIGTERM handler, and the one
+    # pygame installs would keep Pool.terminate() from stopping it
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+# multiprocessing is imported here rather than at the top, as a search that
+# stays in this process never needs it and it is slow to import
+def get_search_pool(workers):
+    global _search_pool, _search_pool_workers, _search_stop, _search_alpha
+    import multiprocessing
+    if _search_pool is None or _search_pool_workers != workers:
+        close_search_pool()
+        _search_stop = multiprocessing.Event()
+        _search_alpha = multiprocessing.Value('d', -math.inf)
+        _search_pool = multiprocessing.Pool(workers, _init_search_worker,
+                                            (_search_stop, _search_alpha))
+        _search_pool_workers = workers
+    return _search_pool
+
+
+def close_search_pool():
+    global _search_pool, _search_pool_workers
+    if _search_pool is not None:
+        _search_pool.close()
+        _search_pool.join()
+        _search_pool = None
+        _search_pool_workers = 0
+
+
+# Runs in a worker: search one root move below the shared best score and
+# report the score, the alpha it was searched with, its PV and the node count
+def _search_root_move(args):
+    global _worker_table, _worker_search_id
+    (pos, index, depth, time_limit, table_mb, search_id,
+     null_move_pruning, late_move_reductions) = args
+    if _worker_table is None or _worker_table.size_mb != table_mb:
+        _worker_table = TranspositionTable(table_mb)
+    if search_id != _worker_search_id:
+        # Once per root search, as the master does with its own table
+        _worker_table.new_search()
+        _worker_search_id = search_id
+    context = SearchContext(_worker_table, time_limit, null_move_pruning, late_move_reductions)
+    context.stop_event = _search_stop
+    alpha = _search_alpha.value - ROOT_TIE_MARGIN
+    try:
+        if alpha == -math.inf:
+            score = -minimax_alpha_beta(pos, depth - 1, -math.inf, math.inf, context, 1)[0]
+        else:
+            # Null window first, as the serial search does for every move
+            # after the first, and a full search only if the move beats alpha
+            score = -minimax_alpha_beta(pos, depth - 1, -alpha - 1, -alpha, context, 1)[0]
+            if score > alpha:
+                score = -minimax_alpha_beta(pos, depth - 1, -math.inf, -alpha, context, 1)[0]
+    except SearchTimeout:
+        return index, None, alpha, [], context.nodes
+    return index, score, alpha, context.pv_table[1], context.nodes
+
+
+def parallel_root_search(pos, depth, context):
+    from multiprocessing import TimeoutError as PoolTimeout
+    in_check = is_in_check(pos, pos.side)
+    moves = generate_legal_moves(pos)
+    if not moves:
+        return (-MATE_SCORE if in_check else 0), None
+    moves = order_moves(pos, moves, NO_MOVE, context, 0)
+
+    pool = get_search_pool(context.workers)
+    _search_stop.clear()
+    _search_alpha.value = -math.inf
+    time_limit = (None if context.deadline is None or context.first_iteration
+                  else max(0.0, context.deadline - time.perf_counter()))
+    table_mb = context.table.size_mb if context.table is not None else TT_SIZE_MB
+    table_mb = max(1, table_mb // context.workers)
+    tasks = []
+    for index, move in enumerate(moves):
+        child = pos.copy()
+        child.make_move(move)
+        tasks.append((child, index, depth, time_limit, table_mb, context.search_id,
+                      context.null_move_pruning, context.late_move_reductions))
+
+    best_score, best_index, best_pv = -math.inf, None, []
+    timed_out = False
+    # The first move is searched on its own so the others get a real alpha
+    for batch in (tasks[:1], tasks[1:]):
+        results = pool.imap_unordered(_search_root_move, batch)
+        for _ in batch:
+            while True:
+                try:
+                    index, score, alpha, pv, nodes = results.next(POOL_POLL_SECONDS)
+                    break
+                except PoolTimeout:
+                    if context.out_of_time():
+                        _search_stop.set()  # The workers give up and report back
+            context.nodes += nodes
+            if score is None:
+                timed_out = True
+                _search_stop.set()
+            elif score > alpha and (score > best_score
+                                    or score == best_score and index < best_index):
+                best_score, best_index, best_pv = score, index, pv
+                _search_alpha.value = best_score
+        if timed_out:
+            break
+    if timed_out:
+        raise SearchTimeout()
+    context.pv_table[0] = [moves[best_index]] + best_pv
+    return best_score, moves[best_index]
+
+
+# Search one ply deeper at a time until the time budget runs out and return
+# the score and move of the deepest iteration that finished. The first
+# iteration always completes so there is a move to play.
+def iterative_deepening(pos, time_limit=AI_TIME_LIMIT, max_depth=MAX_SEARCH_DEPTH,
+                        table=None, context=None):
+    if context is None:
+        context = SearchContext(table, time_limit)
+    context.first_iteration = True
+    root_ply = len(pos.history)
+    best_score, best_move = -math.inf, None
+    for depth in range(1, max_depth + 1):
+        try:
+            if context.workers > 1:
+                score, move = parallel_root_search(pos, depth, context)
+            else:
+                score, move = aspiration_search(pos, depth, best_score, context)
+        except SearchTimeout:
+            # Take back the moves the aborted iteration left on the board
+            while len(pos.history) > root_ply:
+                pos.unmake_move()
+            break
+        best_score, best_move = score, move
+        context.depth = depth
+        context.pv = context.pv_table[0][:]
+        context.first_iteration = False
+        if context.on_iteration is not None:
+            context.on_iteration(context, score)
+        if move is None or context.out_of_time():
+            break
+    context.first_iteration = False
+    return best_score, best_move
@@ -0,0 +1,257 @@
+# Universal Chess Interface front end, for chess GUIs and match runners:
+#
+#     python -m chess_engine.uci
+#
+# Commands are read from stdin on the main thread while the search runs on a
+# thread of its own, so waiting for input never holds the search up and a
+# `stop` is acted on as soon as it arrives.
+
+import sys
+import threading
+import time
+
+from .position import (START_FEN, WHITE_SIDE, Position, generate_legal_moves,
+                       move_from_uci, move_to_uci)
+from .evaluation import pawn_hash_table
+from .search import (AI_TIME_LIMIT, MATE_BOUND, MATE_SCORE, MAX_SEARCH_DEPTH,
+                     SEARCH_WORKERS, TT_SIZE_MB, SearchContext,
+                     TranspositionTable, close_search_pool, get_search_pool,
+                     iterative_deepening)
+
+ENGINE_NAME = 'Minimax Chess AI'
+ENGINE_AUTHOR = 'YousseFaltas'
+HASH_MAX_MB = 1024
+THREADS_MAX = 64
+MOVES_TO_GO = 30  # Moves the clock is shared over when the GUI does not say
+MOVE_OVERHEAD = 0.05  # Seconds kept back per move for communication delays
+
+# `go` arguments that take a number, and those that stand alone
+GO_NUMBERS = ('wtime', 'btime', 'winc', 'binc', 'movestogo', 'depth', 'nodes',
+              'mate', 'movetime')
+GO_FLAGS = ('infinite', 'ponder')
+
+
+# Seconds to think under the `go` arguments, or None when only a depth or
+# node limit was given. With a clock, an even share of the remaining time plus
+# most of the increment, but never more than half of what is left. With no
+# limit at all, AI_TIME_LIMIT.
+def time_budget(params, side):
+    if 'movetime' in params:
+        return max(0.0, params['movetime'] / 1000 - MOVE_OVERHEAD)
+    white = side == WHITE_SIDE
+    remaining = params.get('wtime' if white else 'btime')
+    if remaining is None:
+        return None if 'depth' in params or 'nodes' in params else AI_TIME_LIMIT
+    increment = params.get('winc' if white else 'binc', 0)
+    moves_to_go = max(1, params.get('movestogo', MOVES_TO_GO))
+    budget = min(remaining / moves_to_go + increment * 3 / 4, remaining / 2)
+    return max(0.0, budget / 1000 - MOVE_OVERHEAD)
+
+
+# Search score in UCI terms: centipawns, or moves to mate (negative when
+# being mated)
+def uci_score(score):
+    if score >= MATE_BOUND:
+        return f"mate {(int(MATE_SCORE - score) + 1) // 2}"
+    if score <= -MATE_BOUND:
+        return f"mate {-((int(MATE_SCORE + score) + 1) // 2)}"
+    return f"cp {round(score)}"
+
+
+def parse_go(args):
+    params = {}
+    index = 0
+    while index < len(args):
+        word = args[index]
+        if word in GO_NUMBERS and index + 1 < len(args):
+            params[word] = int(args[index + 1])
+            index += 2
+        else:
+            if word in GO_FLAGS:
+                params[word] = True
+            index += 1  # searchmoves and its move list are not supported
+    return params
+
+
+class UciEngine:
+    def __init__(self, output=None):
+        self.output = output or sys.stdout
+        self.output_lock = threading.Lock()  # The search thread writes too
+        self.hash_mb = TT_SIZE_MB
+        self.table = None  # Allocated at the first search after a Hash change
+        self.workers = SEARCH_WORKERS
+        self.pos = Position.from_fen(START_FEN)
+        self.search_thread = None
+        self.context = None
+        # Set by stop or ponderhit; an infinite or ponder search holds its
+        # best move back until then
+        self.release = None
+        self.ponder_time = None  # Time budget a ponder search gets on ponderhit
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    # Act on one line of input; False once the GUI has said quit
+    def handle(self, line):
+        words = line.split()
+        if not words:
+            return True
+        command, args = words[0], words[1:]
+        if command == 'uci':
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {TT_SIZE_MB} min 1 max {HASH_MAX_MB}")
+            self.send(f"option name Threads type spin default {SEARCH_WORKERS} min 1 max {THREADS_MAX}")
+            self.send("option name Ponder type check default true")
+            self.send("uciok")
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'ucinewgame':
+            self.stop_search()
+            if self.table is not None:
+                self.table.clear()
+            pawn_hash_table.clear()
+        elif command == 'setoption':
+            self.set_option(args)
+        elif command == 'position':
+            self.set_position(args)
+        elif command == 'go':
+            self.go(args)
+        elif command == 'stop':
+            self.stop_search()
+        elif command == 'ponderhit':
+            self.ponderhit()
+        elif command == 'quit':
+            self.stop_search()
+            return False
+        else:
+            self.send(f"info string Unknown command: {command}")
+        return True
+
+    def set_option(self, args):
+        if 'value' in args:
+            split = args.index('value')
+            name, value = ' '.join(args[1:split]).lower(), ' '.join(args[split + 1:])
+        else:
+            name, value = ' '.join(args[1:]).lower(), ''
+        try:
+            if name == 'hash':
+                self.hash_mb = min(max(int(value), 1), HASH_MAX_MB)
+                self.table = None
+            elif name == 'threads':
+                self.workers = min(max(int(value), 1), THREADS_MAX)
+            elif name != 'ponder':  # Pondering needs no setting here
+                self.send(f"info string Unknown option: {name}")
+        except ValueError:
+            self.send(f"info string Invalid value for {name}: {value}")
+
+    def set_position(self, args):
+        if 'moves' in args:
+            split = args.index('moves')
+            args, moves = args[:split], args[split + 1:]
+        else:
+            moves = []
+        try:
+            if args[:1] == ['startpos']:
+                pos = Position.from_fen(START_FEN)
+            elif args[:1] == ['fen']:
+                pos = Position.from_fen(' '.join(args[1:]))
+            else:
+                raise ValueError(f"Invalid position: {' '.join(args)}")
+            for text in moves:
+                pos.make_move(move_from_uci(pos, text))
+        except ValueError as error:
+            self.send(f"info string {error}")
+            return
+        self.pos = pos
+
+    def go(self, args):
+        self.stop_search()
+        try:
+            params = parse_go(args)
+        except ValueError:
+            self.send(f"info string Invalid go: {' '.join(args)}")
+            return
+        if 'mate' in params:
+            self.send("info string go mate is not supported, searching normally")
+        if self.table is None:
+            self.table = TranspositionTable(self.hash_mb)
+        if self.workers > 1:
+            # Start the worker processes from this thread: a child forked
+            # while the main thread sits in stdin.readline() hangs when it
+            # closes its copy of stdin
+            get_search_pool(self.workers)
+        self.table.new_search()
+        pos = self.pos.copy()
+        time_limit = time_budget(params, pos.side)
+        hold = 'infinite' in params or 'ponder' in params
+        self.ponder_time = time_limit if 'ponder' in params else None
+        self.context = SearchContext(self.table, None if hold else time_limit,
+                                     workers=self.workers)
+        self.context.node_limit = params.get('nodes')
+        self.context.on_iteration = self.report
+        max_depth = min(params.get('depth', MAX_SEARCH_DEPTH), MAX_SEARCH_DEPTH)
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+        self.search_thread = threading.Thread(
+            target=self.search, args=(pos, self.context, max_depth, self.release), daemon=True)
+        self.search_thread.start()
+
+    # Runs on the search thread
+    def search(self, pos, context, max_depth, release):
+        score, move = iterative_deepening(pos, max_depth=max_depth, context=context)
+        if move is None:
+            # Stopped before the first iteration finished, or no legal move
+            moves = generate_legal_moves(pos)
+            move = moves[0] if moves else None
+        release.wait()
+        if move is None:
+            self.send("bestmove 0000")
+        elif len(context.pv) > 1 and context.pv[0] == move:
+            self.send(f"bestmove {move_to_uci(move)} ponder {move_to_uci(context.pv[1])}")
+        else:
+            self.send(f"bestmove {move_to_uci(move)}")
+
+    def report(self, context, score):
+        elapsed = time.perf_counter() - context.start
+        nps = int(context.nodes / elapsed) if elapsed > 0 else 0
+        line = (f"info depth {context.depth} score {uci_score(score)} nodes {context.nodes} "
+                f"nps {nps} time {int(elapsed * 1000)}")
+        if context.pv:
+            line += ' pv ' + ' '.join(move_to_uci(move) for move in context.pv)
+        self.send(line)
+
+    # The move being pondered was played: carry on under the normal time
+    # budget, counted from now
+    def ponderhit(self):
+        if self.search_thread is None or self.release.is_set():
+            return
+        if self.ponder_time is not None:
+            self.context.deadline = time.perf_counter() + self.ponder_time
+        self.release.set()
+
+    def stop_search(self):
+        if self.search_thread is not None:
+            self.context.stopped = True
+            self.release.set()
+            self.search_thread.join()
+            self.search_thread = None
+
+
+def main():
+    engine = UciEngine()
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            engine.stop_search()  # Input closed
+            break
+        if not engine.handle(line):
+            break
+    close_search_pool()
+
+
+if __name__ == '__main__':
+    main()
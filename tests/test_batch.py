@@ -0,0 +1,40 @@
+# evaluate_batch must give the same scores as evaluate_static_terms, for
+# positions passed as (N, 64) piece indices or as (N, 12, 8, 8) planes.
+
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from chess_engine import Position, evaluate_batch, generate_legal_moves, positions_to_array
+from chess_engine.evaluation import evaluate_static_terms
+from chess_engine.position import START_FEN
+
+
+# Every position of a few seeded random games from the start position
+def random_game_positions(games=20, plies=80, seed=2024):
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(games):
+        pos = Position.from_fen(START_FEN)
+        for _ in range(plies):
+            moves = generate_legal_moves(pos)
+            if not moves:
+                break
+            pos.make_move(rng.choice(moves))
+            positions.append(pos.copy())
+    return positions
+
+
+def to_planes(squares):
+    return np.stack([squares == piece for piece in range(12)], axis=1).reshape(-1, 12, 8, 8)
+
+
+@pytest.mark.parametrize('color', ['w', 'b'])
+def test_evaluate_batch_matches_scalar(color):
+    positions = random_game_positions()
+    expected = [evaluate_static_terms(pos, color) for pos in positions]
+    squares = positions_to_array(positions)
+    assert evaluate_batch(squares, color) == pytest.approx(expected)
+    assert evaluate_batch(to_planes(squares).astype(np.uint8), color) == pytest.approx(expected)
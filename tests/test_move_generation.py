@@ -0,0 +1,47 @@
+# generate_moves must produce exactly the moves rules() accepts. Checked on
+# the perft suite positions and every position one legal move away from
+# them, for both sides.
+
+from chess_engine import Position, generate_legal_moves, generate_moves, move_to_tuple, rules
+from chess_engine.perft import PERFT_SUITE
+from chess_engine.position import BLACK_SIDE, QUEEN, WHITE_SIDE
+
+
+# Every (row, col, new_row, new_col) that rules() accepts for one colour
+def rules_moves(board, color):
+    moves = set()
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece == '.' or piece[0] != color:
+                continue
+            for new_row in range(8):
+                for new_col in range(8):
+                    if rules(board, row, col, new_row, new_col, piece):
+                        moves.add((row, col, new_row, new_col))
+    return moves
+
+
+def suite_positions():
+    for _, fen, _ in PERFT_SUITE:
+        pos = Position.from_fen(fen)
+        yield pos
+        for move in generate_legal_moves(pos):
+            child = pos.copy()
+            child.make_move(move)
+            yield child
+
+
+def test_generate_moves_matches_rules():
+    checked = 0
+    for pos in suite_positions():
+        board = pos.to_board()
+        for side, color in ((WHITE_SIDE, 'w'), (BLACK_SIDE, 'b')):
+            moves = generate_moves(pos, side)
+            # Promotions come once per piece choice; rules() sees one move
+            tuples = {move_to_tuple(move) for move in moves}
+            promotions = sum(1 for move in moves if move >> 12 == QUEEN)
+            assert len(moves) == len(tuples) + 3 * promotions, board
+            assert tuples == rules_moves(board, color), (board, color)
+            checked += 1
+    assert checked > 300
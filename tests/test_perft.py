@@ -0,0 +1,26 @@
+# The perft suite at shallow depths, so move generation changes are checked
+# by the test run as well as by `python -m chess_engine.perft`.
+
+import io
+
+import pytest
+
+from chess_engine import Position
+from chess_engine.perft import PERFT_SUITE, main, perft, run_suite
+
+SHALLOW_MAX_NODES = 10000
+
+
+@pytest.mark.parametrize('name, fen, counts', PERFT_SUITE, ids=[name for name, _, _ in PERFT_SUITE])
+def test_perft_counts(name, fen, counts):
+    pos = Position.from_fen(fen)
+    for depth, expected in enumerate(counts, 1):
+        if expected > SHALLOW_MAX_NODES:
+            break
+        assert perft(pos, depth) == expected, depth
+
+
+# A depth with no published count must fail the gate, not pass it unchecked
+def test_suite_fails_when_nothing_is_checked():
+    assert not run_suite(depth=7, output=io.StringIO())
+    assert main(['-d', '7']) == 1
@@ -0,0 +1,19 @@
+# Search behaviour the GUI and the UCI front end rely on.
+
+from chess_engine import Position, SearchContext, TranspositionTable, iterative_deepening
+from chess_engine.position import START_FEN
+
+
+# A second search of a position finds the root's children already in the
+# table, deeper than it needs them; the PV must still go past the root move,
+# as pondering plays its second move
+def test_pv_continues_past_table_cutoffs():
+    table = TranspositionTable(1)
+    iterative_deepening(Position.from_fen(START_FEN), time_limit=None, max_depth=5, table=table)
+    table.new_search()
+    pvs = []
+    context = SearchContext(table)
+    context.on_iteration = lambda context, score: pvs.append(context.pv)
+    iterative_deepening(Position.from_fen(START_FEN), max_depth=3, context=context)
+    assert len(pvs) == 3
+    assert all(len(pv) >= 2 for pv in pvs[1:])